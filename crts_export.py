@@ -4,9 +4,27 @@ import math
 import struct
 import json
 import os
+import stat
+import shutil
+import tempfile
 import array
+import concurrent.futures
 from bpy_extras.io_utils import ExportHelper
 
+# Blender bundles numpy, but fall back to the stdlib array module if it's
+# somehow unavailable; both support foreach_get's buffer-protocol fast path
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# orjson serializes the header several times faster than stdlib json and
+# emits bytes directly, but it's not bundled with Blender so it's optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 bl_info = {
     "name": "crts_export",
     "author": "Will Usher",
@@ -18,60 +36,50 @@ bl_info = {
     "wiki_url": "https://github.com/Twinklebear/blender_export_crts"
 }
 
-def compute_mesh_buffer_sizes(mesh):
-    unique_verts = {}
-    uvs = {}
-    normals = {}
-    for t in mesh.loop_triangles:
-        for l in t.loops:
-            vert_idx = mesh.loops[l].vertex_index
-            uv_idx = -1
-            if len(mesh.uv_layers) > 0:
-                uv = (mesh.uv_layers.active.data[l].uv[0], mesh.uv_layers.active.data[l].uv[1])
-                if uv not in uvs:
-                    uvs[uv] = l
-                    uv_idx = l
-                else:
-                    uv_idx = uvs[uv]
-            
-            normal = (mesh.loops[l].normal[0], mesh.loops[l].normal[1], mesh.loops[l].normal[2])
-            n_idx = -1
-            if normal not in normals:
-                normals[normal] = l
-                n_idx = l
-            else:
-                n_idx = normals[normal]
+# Compiled once so pack calls skip re-parsing the format string
+_UINT64 = struct.Struct("<Q")
 
-            idx = (vert_idx, uv_idx, n_idx)
-            if not idx in unique_verts:
-                vid = len(unique_verts)
-                unique_verts[idx] = vid
-    n_verts = len(unique_verts)
-    uvs_size = 0
-    if len(uvs) > 0:
-        uvs_size = n_verts * 2 * 4
-    return (n_verts * 3 * 4, len(mesh.loop_triangles) * 3 * 4, uvs_size, n_verts * 3 * 4)
+# UVs and normals are quantized to 1/65536 (~1.5e-5) for deduplication so
+# the tiny FP noise Blender's split-normal computation introduces doesn't
+# inflate the unique vertex count; the written values are untouched
+_DEDUP_QUANT = 65536.0
 
-def write_mesh_info(meshes, header, byte_offset):
+def write_mesh_info(meshes, header, f):
     mesh_indices = {}
-    for mesh in meshes:
-        if mesh.users == 0:
-            continue
+    views = header["buffer_views"]
+    views_append = views.append
 
+    exported = [m for m in meshes if m.users != 0]
+    for mesh in exported:
         mesh.calc_loop_triangles()
         mesh.calc_normals_split()
-        verts_size, indices_size, uvs_size, normals_size = compute_mesh_buffer_sizes(mesh)
 
-        positions_view = len(header["buffer_views"])
-        header["buffer_views"].append({
+    # Dedup and gather every mesh in parallel; foreach_get and numpy both
+    # release the GIL, so the per-mesh work scales across threads. The
+    # writes stay sequential in mesh order below.
+    if len(exported) > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+            payloads = list(ex.map(mesh_buffer_segments, exported))
+    else:
+        payloads = [mesh_buffer_segments(mesh) for mesh in exported]
+
+    for mesh, (segments, sizes) in zip(exported, payloads):
+        # Write the payload first and build the buffer views from the
+        # sizes actually written, instead of predicting them up front
+        byte_offset = f.tell()
+        f.write(b"".join(segments))
+        verts_size, indices_size, uvs_size, normals_size = sizes
+
+        positions_view = len(views)
+        views_append({
             "byte_offset": byte_offset,
             "byte_length": verts_size,
             "type": "VEC3_F32"
         })
         byte_offset += verts_size
 
-        indices_view = positions_view + 1
-        header["buffer_views"].append({
+        indices_view = len(views)
+        views_append({
             "byte_offset": byte_offset,
             "byte_length": indices_size,
             "type": "VEC3_U32"
@@ -80,18 +88,18 @@ def write_mesh_info(meshes, header, byte_offset):
 
         uvs_view = -1
         if uvs_size > 0:
-            uvs_view = indices_view + 1
-            header["buffer_views"].append({
+            uvs_view = len(views)
+            views_append({
                 "byte_offset": byte_offset,
                 "byte_length": uvs_size,
                 "type": "VEC2_F32"
             })
             byte_offset += uvs_size
-            
+
         normals_view = -1
         if normals_size > 0:
-            normals_view = uvs_view + 1
-            header["buffer_views"].append({
+            normals_view = len(views)
+            views_append({
                 "byte_offset": byte_offset,
                 "byte_length": normals_size,
                 "type": "VEC3_F32"
@@ -109,14 +117,18 @@ def write_mesh_info(meshes, header, byte_offset):
         if normals_view != -1:
             mesh_info["normals"] = normals_view
         header["meshes"].append(mesh_info)
-    return byte_offset, mesh_indices
+    return mesh_indices
 
 def write_image_info(images, header, byte_offset):
     image_indices = {}
-    for img in bpy.data.images:
+    # Each payload entry is ("packed", data, size) or ("file", path, size),
+    # recorded here so the write phase doesn't re-classify and re-stat
+    # every image
+    image_payloads = []
+    for img in images:
         if img.users == 0:
             continue
-        
+
         # TODO: For generated textures how could we bake them to images?
         # we could evaluate it to create a new image, pack that image into
         # the blend file temporarily to generate a PNG we can embed, then
@@ -127,12 +139,19 @@ def write_image_info(images, header, byte_offset):
         img_bytes = 0
         if img.packed_file:
             img_bytes = img.packed_file.size
+            image_payloads.append(("packed", img.packed_file.data, img_bytes))
         else:
             path = img.filepath_from_user()
-            if not os.path.isfile(path):
+            # One stat gives both the regular-file check and the size
+            try:
+                st = os.stat(path)
+                if not stat.S_ISREG(st.st_mode):
+                    raise OSError
+            except OSError:
                 print("Image file {} is not packed and not on disk, skipping".format(img.name))
                 continue
-            img_bytes = os.path.getsize(path)
+            img_bytes = st.st_size
+            image_payloads.append(("file", path, img_bytes))
         view = len(header["buffer_views"])
         header["buffer_views"].append({
             "byte_offset": byte_offset,
@@ -148,25 +167,34 @@ def write_image_info(images, header, byte_offset):
             "name": img.name,
             "view": view,
             "type": img.file_format,
-            "color_space": color_space            
+            "color_space": color_space
         })
-    return byte_offset, image_indices
+    return byte_offset, image_indices, image_payloads
+
+# Scalar Principled BSDF inputs we export, mapped to their key in the header
+_MAT_KEY_MAP = {
+    "Metallic": "metallic",
+    "Specular": "specular",
+    "Specular Tint": "specular_tint",
+    "Roughness": "roughness",
+    "Anisotropic": "anisotropic",
+    "Sheen": "sheen",
+    "Sheen Tint": "sheen_tint",
+    "Clearcoat": "clearcoat",
+    "Clearcoat Roughness": "clearcoat_roughness",
+    "IOR": "ior",
+    "Transmission": "transmission"
+}
+
+_SEPRGB_CHANNELS = {"R": 0, "G": 1, "B": 2}
 
-def get_seprgb_texture_info(link):
-    from_node = link.from_node
+def get_seprgb_texture_info(from_node, channel_name):
     if from_node.type != "SEPRGB":
         print("Only Separate RGB nodes may be input to scalar material property, found {}"
                 .format(from_node.type))
         return None
-    else:
-        channel = link.from_socket.name
-        if channel == "R":
-            channel = 0
-        elif channel == "G":
-            channel = 1
-        else:
-            channel = 2
-        return (from_node.inputs["Image"].links[0].from_node.image, channel)
+    channel = _SEPRGB_CHANNELS.get(channel_name, 2)
+    return (from_node.inputs["Image"].links[0].from_node.image, channel)
 
 def write_material_info(materials, header, image_indices):
     material_indices = {}
@@ -177,10 +205,8 @@ def write_material_info(materials, header, image_indices):
         # No support for shader node graphs/etc. just take the principled BSDF node
         principled_node = None
         if m.node_tree:
-            for n in m.node_tree.nodes:
-                if n.type == "BSDF_PRINCIPLED":
-                    principled_node = n
-                    break
+            principled_node = next(
+                (n for n in m.node_tree.nodes if n.type == "BSDF_PRINCIPLED"), None)
         if not principled_node:
             print("Error: Unsupported Material {}, no Principled BSDF found!".format(m.name))
             continue
@@ -188,49 +214,62 @@ def write_material_info(materials, header, image_indices):
         mat = {
             "name": m.name
         }
-        export_param_list = ["Metallic", "Specular", "Specular Tint", "Roughness",
-            "Anisotropic", "Sheen", "Sheen Tint", "Clearcoat", "Clearcoat Roughness",
-            "IOR", "Transmission"]
-        for i in principled_node.inputs:
-            if i.name == "Base Color":
-                mat["base_color"] = [i.default_value[0], i.default_value[1], i.default_value[2]]
-                if len(i.links) > 0:
-                    texture = i.links[0].from_node
-                    if texture.type != "TEX_IMAGE" or i.links[0].from_socket.type != "RGBA":
-                        print("Unsupported input type/socket to base color {}/{}"
-                                .format(texture.type, i.links[0].from_socket.type))
-                        continue
-                    if texture.image.name in image_indices:
-                        mat["base_color_texture"] = image_indices[texture.image.name]
-                    else:
-                        print("Skipping assignment of base color texture {} for material {}"
-                                .format(texture.image.name, m.name))
-            elif i.name in export_param_list:
-                json_name = i.name.lower().replace(" ", "_")
-                mat[json_name] = i.default_value
-                if len(i.links) > 0:
-                    tex_info = get_seprgb_texture_info(i.links[0])
-                    if tex_info:
-                        mat[json_name + "_texture"] = {
-                            "texture": image_indices[tex_info[0].name],
-                            "channel": tex_info[1]
-                        }
+        # Look the sockets we export up by name instead of scanning all of
+        # the node's inputs; the collection lookup is a C-level find and
+        # stays valid if Blender re-orders the sockets between versions
+        inputs = principled_node.inputs
+        i = inputs.get("Base Color")
+        if i:
+            mat["base_color"] = [i.default_value[0], i.default_value[1], i.default_value[2]]
+            if len(i.links) > 0:
+                texture = i.links[0].from_node
+                if texture.type != "TEX_IMAGE" or i.links[0].from_socket.type != "RGBA":
+                    print("Unsupported input type/socket to base color {}/{}"
+                            .format(texture.type, i.links[0].from_socket.type))
+                elif texture.image.name in image_indices:
+                    mat["base_color_texture"] = image_indices[texture.image.name]
+                else:
+                    print("Skipping assignment of base color texture {} for material {}"
+                            .format(texture.image.name, m.name))
+        for socket_name, json_name in _MAT_KEY_MAP.items():
+            i = inputs.get(socket_name)
+            if not i:
+                continue
+            mat[json_name] = i.default_value
+            links = i.links
+            if len(links) > 0:
+                link = links[0]
+                tex_info = get_seprgb_texture_info(link.from_node, link.from_socket.name)
+                if tex_info:
+                    mat[json_name + "_texture"] = {
+                        "texture": image_indices[tex_info[0].name],
+                        "channel": tex_info[1]
+                    }
         header["materials"].append(mat)
     return material_indices
 
 def write_object_info(objects, header, material_indices, mesh_indices):
-    for o in objects:
-        # crts store the matrix as column-major and uses Y up
-        tfm = (mathutils.Matrix.Rotation(math.radians(-90), 4, "X") @ o.matrix_world).transposed()
+    objects = list(objects)
+    # crts store the matrix as column-major and uses Y up. Stack every
+    # object's world matrix and apply the basis change in one batched
+    # matmul instead of going through mathutils per object; Blender stores
+    # matrices as float internally so float32 loses no precision.
+    if np is not None:
+        rot_x = np.array(mathutils.Matrix.Rotation(math.radians(-90), 4, "X"), dtype=np.float32)
+        world = np.empty((len(objects), 4, 4), dtype=np.float32)
+        for i, o in enumerate(objects):
+            world[i] = o.matrix_world
+        matrices = np.matmul(rot_x, world).transpose(0, 2, 1).reshape(-1, 16).tolist()
+    else:
+        rot_x = mathutils.Matrix.Rotation(math.radians(-90), 4, "X")
+        matrices = [[x for row in (rot_x @ o.matrix_world).transposed() for x in row]
+                for o in objects]
+
+    for i, o in enumerate(objects):
         obj_data = {
             "name": o.name,
             "type": o.type,
-            "matrix": [
-                tfm[0][0], tfm[0][1], tfm[0][2], tfm[0][3],
-                tfm[1][0], tfm[1][1], tfm[1][2], tfm[1][3],
-                tfm[2][0], tfm[2][1], tfm[2][2], tfm[2][3],
-                tfm[3][0], tfm[3][1], tfm[3][2], tfm[3][3]
-            ]
+            "matrix": matrices[i]
         }
         if o.type == "MESH":
             mat_id = -1
@@ -269,26 +308,110 @@ def write_object_info(objects, header, material_indices, mesh_indices):
         header["objects"].append(obj_data)
 
 
-def write_mesh_buffers(mesh, output):
+def foreach_get_f32(collection, attr, n_floats):
+    # Fill a flat float32 buffer with one C call
+    if np is not None:
+        buf = np.empty(n_floats, dtype=np.float32)
+    else:
+        buf = array.array("f", bytes(4 * n_floats))
+    collection.foreach_get(attr, buf)
+    return buf
+
+def gather_f32_bytes(buf, ids, width):
+    # Gather the width-element groups of buf selected by ids as bytes
+    if np is not None:
+        return buf.reshape(-1, width)[ids].tobytes()
+    out = array.array("f")
+    for i in ids:
+        out.extend(buf[i * width:(i + 1) * width])
+    return out.tobytes()
+
+def index_bytes(indices):
+    if np is not None:
+        return np.asarray(indices, dtype=np.uint32).tobytes()
+    return array.array("I", indices).tobytes()
+
+def copy_file_contents(fimg, f, size):
+    # Copy in kernel space with sendfile where available (Linux/macOS),
+    # falling back to chunked userspace copies elsewhere. The output must
+    # be flushed first since sendfile works on the raw fd.
+    if hasattr(os, "sendfile"):
+        f.flush()
+        copied = 0
+        try:
+            while copied < size:
+                sent = os.sendfile(f.fileno(), fimg.fileno(), None, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+            return
+        except OSError:
+            if copied > 0:
+                raise
+    shutil.copyfileobj(fimg, f, 1024 * 1024)
+
+def build_mesh_topology(mesh):
+    # Deduplicate the mesh's loops into unique (vertex, uv, normal)
+    # combinations. Returns parallel arrays with, for each unique vertex,
+    # the source vertex index and the loops to take the UV and normal
+    # from, plus the triangle indices remapped into the unique set.
+    has_uv = len(mesh.uv_layers) > 0
+    if np is not None:
+        nloops = len(mesh.loops)
+        loop_verts = np.empty(nloops, dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loop_verts)
+        loop_normals = np.empty(nloops * 3, dtype=np.float32)
+        mesh.loops.foreach_get("normal", loop_normals)
+        tri_loops = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("loops", tri_loops)
+
+        # Compose a per-loop key of the vertex index and attribute values;
+        # one np.unique over the keys referenced by the triangles replaces
+        # the per-loop dict hashing with a single C-level pass
+        key = np.empty((nloops, 6 if has_uv else 4), dtype=np.float64)
+        key[:, 0] = loop_verts
+        key[:, 1:4] = np.rint(loop_normals.reshape(-1, 3) * _DEDUP_QUANT)
+        if has_uv:
+            loop_uvs = np.empty(nloops * 2, dtype=np.float32)
+            mesh.uv_layers.active.data.foreach_get("uv", loop_uvs)
+            key[:, 4:6] = np.rint(loop_uvs.reshape(-1, 2) * _DEDUP_QUANT)
+
+        _, first, inverse = np.unique(key[tri_loops], axis=0,
+                return_index=True, return_inverse=True)
+        rep_loops = tri_loops[first]
+        vert_ids = loop_verts[rep_loops]
+        # Keep the index arrays at int32: np.unique hands back int64 and
+        # the extra width is pure overhead for mesh-sized index ranges
+        return vert_ids, rep_loops if has_uv else None, rep_loops, inverse.astype(np.int32)
+
     unique_verts = {}
     vertex_list = []
     vertex_indices = []
     uvs = {}
     normals = {}
+    # Bind the RNA collections once; resolving them per loop is a C call
+    mesh_loops = mesh.loops
+    uv_data = mesh.uv_layers.active.data if has_uv else None
+    # Width of a loop index field in the packed dedup key, with one spare
+    # bit so the -1 "no UV" sentinel maps to a value no loop index reaches
+    shift = max(len(mesh_loops), 1).bit_length() + 1
     for t in mesh.loop_triangles:
         for l in t.loops:
-            vert_idx = mesh.loops[l].vertex_index
+            vert_idx = mesh_loops[l].vertex_index
 
             uv_idx = -1
-            if len(mesh.uv_layers) > 0:
-                uv = (mesh.uv_layers.active.data[l].uv[0], mesh.uv_layers.active.data[l].uv[1])
+            if has_uv:
+                uv_co = uv_data[l].uv
+                uv = (round(uv_co[0] * _DEDUP_QUANT), round(uv_co[1] * _DEDUP_QUANT))
                 if uv not in uvs:
                     uvs[uv] = l
                     uv_idx = l
                 else:
                     uv_idx = uvs[uv]
-                
-            normal = (mesh.loops[l].normal[0], mesh.loops[l].normal[1], mesh.loops[l].normal[2])
+
+            n_co = mesh_loops[l].normal
+            normal = (round(n_co[0] * _DEDUP_QUANT), round(n_co[1] * _DEDUP_QUANT),
+                    round(n_co[2] * _DEDUP_QUANT))
             n_idx = -1
             if normal not in normals:
                 normals[normal] = l
@@ -296,31 +419,45 @@ def write_mesh_buffers(mesh, output):
             else:
                 n_idx = normals[normal]
 
-            idx = (vert_idx, uv_idx, n_idx)
-            vid = -1
-            if not idx in unique_verts:
+            # Pack the three indices into a single int key: cheaper to
+            # hash than a tuple and no per-loop tuple allocation
+            key = (((vert_idx << shift) | (uv_idx + 1)) << shift) | (n_idx + 1)
+            vid = unique_verts.get(key, -1)
+            if vid == -1:
                 vid = len(vertex_list)
-                unique_verts[idx] = vid
-                vertex_list.append(idx)
-            else:
-                vid = unique_verts[idx]
+                unique_verts[key] = vid
+                vertex_list.append((vert_idx, uv_idx, n_idx))
             vertex_indices.append(vid)
-            
-    for v in vertex_list:
-        vert = mesh.vertices[v[0]]
-        output.extend(struct.pack("<fff", vert.co[0], vert.co[1], vert.co[2]))
-    
-    for id in vertex_indices:
-        output.extend(struct.pack("<I", id))
-
-    if len(mesh.uv_layers) > 0:
-        for v in vertex_list:
-            uv = [mesh.uv_layers.active.data[v[1]].uv[0], mesh.uv_layers.active.data[v[1]].uv[1]]
-            output.extend(struct.pack("<ff", uv[0], uv[1]))
-
-    for v in vertex_list:
-        normal = [mesh.loops[v[2]].normal[0], mesh.loops[v[2]].normal[1], mesh.loops[v[2]].normal[2]]
-        output.extend(struct.pack("<fff", normal[0], normal[1], normal[2]))
+    return ([v[0] for v in vertex_list],
+            [v[1] for v in vertex_list] if has_uv else None,
+            [v[2] for v in vertex_list],
+            vertex_indices)
+
+def mesh_buffer_segments(mesh):
+    # Serialize one mesh's buffers, returning the byte segments and their
+    # (positions, indices, uvs, normals) sizes
+    vert_ids, uv_ids, n_ids, vertex_indices = build_mesh_topology(mesh)
+
+    # Pull all vertex positions in one C call, then gather the
+    # deduplicated set instead of packing each vertex in Python
+    coords = foreach_get_f32(mesh.vertices, "co", len(mesh.vertices) * 3)
+    positions = gather_f32_bytes(coords, vert_ids, 3)
+
+    indices = index_bytes(vertex_indices)
+
+    uvs_size = 0
+    segments = [positions, indices]
+    if uv_ids is not None:
+        loop_uvs = foreach_get_f32(mesh.uv_layers.active.data, "uv", len(mesh.loops) * 2)
+        uvs = gather_f32_bytes(loop_uvs, uv_ids, 2)
+        segments.append(uvs)
+        uvs_size = len(uvs)
+
+    loop_normals = foreach_get_f32(mesh.loops, "normal", len(mesh.loops) * 3)
+    normals = gather_f32_bytes(loop_normals, n_ids, 3)
+    segments.append(normals)
+
+    return segments, (len(positions), len(indices), uvs_size, len(normals))
 
 def export_crts(operator, scene, filepath=""):
     header = {
@@ -331,8 +468,13 @@ def export_crts(operator, scene, filepath=""):
         "images": []
     }
 
+    # Snapshot the data-block collections once so the header and payload
+    # passes iterate the same lists and skip repeated RNA collection lookups
+    meshes = list(bpy.data.meshes)
+    images = list(bpy.data.images)
+
     # Check no meshes are using multiple materials
-    for mesh in bpy.data.meshes:
+    for mesh in meshes:
         if mesh.users == 0:
             continue
         if len(mesh.materials) > 1:
@@ -340,36 +482,42 @@ def export_crts(operator, scene, filepath=""):
                     "Please split mesh '{}' into per-material meshes to ensure proper export".format(mesh.name))
             return {"CANCELLED"}
 
-    byte_offset, mesh_indices = write_mesh_info(bpy.data.meshes, header, 0)
-    byte_offset, image_indices = write_image_info(bpy.data.images, header, byte_offset)
-    material_indices = write_material_info(bpy.data.materials, header, image_indices)
-    write_object_info(scene.objects, header, material_indices, mesh_indices)
-
-    with open(filepath, "wb") as f:
-        # Pretty print the header for testing
-        header_bytes = bytearray(json.dumps(header, indent=4), "utf-8")
-        f.write(struct.pack("<Q", len(header_bytes)))
-        f.write(header_bytes)
-        # Write mesh buffers
-        for mesh in bpy.data.meshes:
-            if mesh.users == 0:
-                continue
-            
-            buf = bytearray()
-            write_mesh_buffers(mesh, buf)
-            f.write(buf)               
-        # Write image buffers
-        for img in bpy.data.images:
-            if img.users == 0:
-                continue
-            
-            if img.packed_file:
-                f.write(img.packed_file.data)
+    # Serialize the payload to a spooled temp file while recording the
+    # offsets actually written, then build the header from those and
+    # prepend it. Payloads up to the spool limit never touch the disk
+    # twice; bigger ones roll over to a real temp file automatically.
+    with tempfile.SpooledTemporaryFile(max_size=256 << 20,
+            dir=os.path.dirname(os.path.abspath(filepath))) as tmp:
+        mesh_indices = write_mesh_info(meshes, header, tmp)
+        _, image_indices, image_payloads = write_image_info(images, header, tmp.tell())
+        for kind, src, size in image_payloads:
+            if kind == "packed":
+                tmp.write(memoryview(src))
+            else:
+                # copyfileobj rather than sendfile here: fetching the
+                # spool's fileno would force it to roll over to disk
+                with open(src, "rb") as fimg:
+                    shutil.copyfileobj(fimg, tmp, 1024 * 1024)
+        payload_size = tmp.tell()
+
+        material_indices = write_material_info(bpy.data.materials, header, image_indices)
+        write_object_info(scene.objects, header, material_indices, mesh_indices)
+
+        with open(filepath, "wb") as f:
+            # Indentation is purely cosmetic and bloats the header, so emit
+            # the most compact encoding
+            if orjson is not None:
+                header_bytes = orjson.dumps(header)
+            else:
+                header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+            # Emit the length prefix and header in one write
+            f.write(_UINT64.pack(len(header_bytes)) + header_bytes)
+            tmp.seek(0)
+            if getattr(tmp, "_rolled", False):
+                # The spool is a real file on disk, copy it in kernel space
+                copy_file_contents(tmp, f, payload_size)
             else:
-                path = img.filepath_from_user()
-                if len(path) > 0 and os.path.isfile(path):
-                    with open(path, "rb") as fimg:
-                        f.write(fimg.read())
+                shutil.copyfileobj(tmp, f, 1024 * 1024)
     return {"FINISHED"}
 
 class ExportCRTS(bpy.types.Operator, ExportHelper):